@@ -337,6 +337,9 @@ class HttpApi(HttpApiBase):
     def get_operation_spec(self, operation_name):
         return self.api_spec[SpecProp.OPERATIONS].get(operation_name, None)
 
+    def get_all_operation_specs(self):
+        return self.api_spec[SpecProp.OPERATIONS]
+
     def get_operation_specs_by_model_name(self, model_name):
         if model_name:
             return self.api_spec[SpecProp.MODEL_OPERATIONS].get(model_name, None)
@@ -355,6 +358,32 @@ class HttpApi(HttpApiBase):
     def validate_path_params(self, operation_name, params):
         return self.api_validator.validate_path_params(operation_name, params)
 
+    def validate_all(self, operation_name, params):
+        """
+        Validates query params, path params and data of the operation in a single call.
+
+        :param operation_name: name of the operation to validate params for
+        :type operation_name: str
+        :param params: params to validate, can contain `query_params`, `path_params` and `data` keys
+        :type params: dict
+        :return: `(is_valid, validation_report)` pairs for each validated key. When validation itself fails,
+                 the pair contains False and the error message.
+        :rtype: dict
+        """
+        validators = {
+            'query_params': self.validate_query_params,
+            'path_params': self.validate_path_params,
+            'data': self.validate_data
+        }
+        results = {}
+        for field_name, validator in validators.items():
+            if field_name in params:
+                try:
+                    results[field_name] = validator(operation_name, params[field_name])
+                except Exception as e:
+                    results[field_name] = False, str(e)
+        return results
+
     @property
     def api_spec(self):
         if self._api_spec is None:
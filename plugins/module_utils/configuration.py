@@ -17,20 +17,23 @@
 #
 import copy
 from functools import partial
+from itertools import islice
 
-from ansible.module_utils.six import iteritems
+from ansible.module_utils.connection import ConnectionError
 
 try:
     from ansible.module_utils.common import HTTPMethod, equal_objects, FtdConfigurationError, \
         FtdServerError, ResponseParams, copy_identity_properties, FtdUnexpectedResponse
-    from ansible.module_utils.fdm_swagger_client import OperationField, ValidationError
+    from ansible.module_utils.fdm_swagger_client import OperationField, OperationParams, ValidationError
 except ImportError:
     from module_utils.common import HTTPMethod, equal_objects, FtdConfigurationError, \
         FtdServerError, ResponseParams, copy_identity_properties, FtdUnexpectedResponse
-    from module_utils.fdm_swagger_client import OperationField, ValidationError
+    from module_utils.fdm_swagger_client import OperationField, OperationParams, ValidationError
 
 DEFAULT_PAGE_SIZE = 10
 DEFAULT_OFFSET = 0
+# bigger pages reduce the number of requests when objects are filtered on the client side only
+CLIENT_SIDE_FILTERING_PAGE_SIZE = 100
 
 NO_CONTENT_STATUS = 204
 UNPROCESSABLE_ENTITY_STATUS = 422
@@ -53,6 +56,15 @@ ADD_OPERATION_NOT_SUPPORTED_ERROR = (
 
 PATH_PARAMS_FOR_DEFAULT_OBJ = {'objId': 'default'}
 
+# most endpoints only support filtering by name on the server side
+SERVER_FILTERABLE_FIELDS = frozenset(['name'])
+
+# distinguishes absent object fields from fields set to None
+_MISSING = object()
+
+# JSON-RPC error code returned by ansible-connection when the connection plugin has no such method
+METHOD_NOT_FOUND_ERROR_CODE = -32601
+
 
 class OperationNamePrefix:
     ADD = 'add'
@@ -62,6 +74,14 @@ class OperationNamePrefix:
     UPSERT = 'upsert'
 
 
+class OperationKind:
+    ADD = 1
+    EDIT = 2
+    DELETE = 3
+    GET_LIST = 4
+    GENERAL = 5
+
+
 class QueryParams:
     FILTER = 'filter'
 
@@ -201,22 +221,45 @@ class OperationChecker(object):
         :return: True if all criteria required to provide requested called operation are satisfied, otherwise False
         :rtype: bool
         """
-        has_edit_op = next((name for name, spec in iteritems(operations) if cls.is_edit_operation(name, spec)), None)
-        has_get_list_op = next((name for name, spec in iteritems(operations)
+        has_edit_op = next((name for name, spec in operations.items() if cls.is_edit_operation(name, spec)), None)
+        has_get_list_op = next((name for name, spec in operations.items()
                                 if cls.is_get_list_operation(name, spec)), None)
         return has_edit_op and has_get_list_op
 
 
 class BaseConfigurationResource(object):
+    # subclasses need their own `__slots__` as well to keep instances without a `__dict__`
+    __slots__ = (
+        '_conn', '_conn_send', '_conn_validators', 'config_changed', '_operation_spec_cache',
+        '_models_operations_specs_cache', '_all_operation_specs_loaded', '_model_get_operations_cache',
+        '_server_filterable_fields_cache', '_operation_kind_cache', '_request_params_cache', '_object_cache',
+        '_validate_all_supported', '_check_mode', '_operation_checker', '_system_info', '_name_filter_prefix'
+    )
 
     def __init__(self, conn, check_mode=False):
         self._conn = conn
+        # bound once as these connection methods are called for every request, so methods replaced on `conn`
+        # after the resource is created (e.g. mocked in tests) are not used by it
+        self._conn_send = conn.send_request
+        self._conn_validators = {
+            ParamName.QUERY_PARAMS: conn.validate_query_params,
+            ParamName.PATH_PARAMS: conn.validate_path_params,
+            ParamName.DATA: conn.validate_data
+        }
         self.config_changed = False
         self._operation_spec_cache = {}
         self._models_operations_specs_cache = {}
+        self._all_operation_specs_loaded = None
+        self._model_get_operations_cache = {}
+        self._server_filterable_fields_cache = {}
+        self._operation_kind_cache = {}
+        self._request_params_cache = {}
+        self._object_cache = {}
+        self._validate_all_supported = None
         self._check_mode = check_mode
         self._operation_checker = OperationChecker
         self._system_info = None
+        self._name_filter_prefix = None
 
     def execute_operation(self, op_name, params):
         """
@@ -246,62 +289,132 @@ class BaseConfigurationResource(object):
         :return: Result of the operation being executed
         :rtype: dict
         """
-        op_spec = self.get_operation_spec(op_name)
-        if op_spec is None:
-            raise FtdInvalidOperationNameError(op_name)
+        op_kind = self._get_operation_kind(op_name)
 
-        if self._operation_checker.is_add_operation(op_name, op_spec):
+        if op_kind == OperationKind.ADD:
             resp = self.add_object(op_name, params)
-        elif self._operation_checker.is_edit_operation(op_name, op_spec):
+        elif op_kind == OperationKind.EDIT:
             resp = self.edit_object(op_name, params)
-        elif self._operation_checker.is_delete_operation(op_name, op_spec):
+        elif op_kind == OperationKind.DELETE:
             resp = self.delete_object(op_name, params)
-        elif self._operation_checker.is_find_by_filter_operation(op_name, params, op_spec):
+        elif op_kind == OperationKind.GET_LIST and params.get(ParamName.FILTERS):
             resp = list(self.get_objects_by_filter(op_name, params))
         else:
             resp = self.send_general_request(op_name, params)
         return resp
 
+    def _get_operation_kind(self, op_name):
+        """
+        Classifies the operation by its name and specification. The result is cached, as the classification
+        does not change while the resource exists.
+
+        :param op_name: name of the operation being called by the user
+        :type op_name: str
+        :return: one of the `OperationKind` values
+        :rtype: int
+        """
+        if op_name not in self._operation_kind_cache:
+            op_spec = self.get_operation_spec(op_name)
+            if op_spec is None:
+                raise FtdInvalidOperationNameError(op_name)
+
+            checker = self._operation_checker
+            if checker.is_add_operation(op_name, op_spec):
+                op_kind = OperationKind.ADD
+            elif checker.is_edit_operation(op_name, op_spec):
+                op_kind = OperationKind.EDIT
+            elif checker.is_delete_operation(op_name, op_spec):
+                op_kind = OperationKind.DELETE
+            elif checker.is_get_list_operation(op_name, op_spec):
+                op_kind = OperationKind.GET_LIST
+            else:
+                op_kind = OperationKind.GENERAL
+            self._operation_kind_cache[op_name] = op_kind
+        return self._operation_kind_cache[op_name]
+
     def get_operation_spec(self, operation_name):
         if operation_name not in self._operation_spec_cache:
+            if self._load_all_operation_specs():
+                return self._operation_spec_cache.get(operation_name)
             self._operation_spec_cache[operation_name] = self._conn.get_operation_spec(operation_name)
         return self._operation_spec_cache[operation_name]
 
     def get_operation_specs_by_model_name(self, model_name):
         if model_name not in self._models_operations_specs_cache:
+            if self._load_all_operation_specs():
+                return self._models_operations_specs_cache.get(model_name)
             model_op_specs = self._conn.get_operation_specs_by_model_name(model_name)
             self._models_operations_specs_cache[model_name] = model_op_specs
-            for op_name, op_spec in iteritems(model_op_specs):
+            for op_name, op_spec in model_op_specs.items():
                 self._operation_spec_cache.setdefault(op_name, op_spec)
         return self._models_operations_specs_cache[model_name]
 
-    def get_objects_by_filter(self, operation_name, params):
+    def _load_all_operation_specs(self):
+        """
+        Fills spec caches with specifications of all operations fetched by a single call to the connection,
+        so no further calls are needed to get operation specs. The specs are loaded on the first cache miss.
 
-        def match_filters(filter_params, obj):
-            for k, v in iteritems(filter_params):
-                if k not in obj or obj[k] != v:
-                    return False
-            return True
+        :return: True if all operation specs are loaded, False if the connection plugin does not support it
+        :rtype: bool
+        """
+        if self._all_operation_specs_loaded is None:
+            try:
+                op_specs = self._conn.get_all_operation_specs()
+            except (AttributeError, ConnectionError) as e:
+                if not _is_method_not_found_error(e):
+                    raise
+                self._all_operation_specs_loaded = False
+            else:
+                for op_name, op_spec in op_specs.items():
+                    self._operation_spec_cache.setdefault(op_name, op_spec)
+                    model_name = op_spec.get(OperationField.MODEL_NAME)
+                    if model_name:
+                        self._models_operations_specs_cache.setdefault(model_name, {})[op_name] = op_spec
+                self._all_operation_specs_loaded = True
+        return self._all_operation_specs_loaded
 
+    def get_objects_by_filter(self, operation_name, params):
         _, query_params, path_params = _get_user_params(params)
         # copy required params to avoid mutation of passed `params` dict
         url_params = {ParamName.QUERY_PARAMS: dict(query_params), ParamName.PATH_PARAMS: dict(path_params)}
 
         filters = params.get(ParamName.FILTERS) or {}
-        if QueryParams.FILTER not in url_params[ParamName.QUERY_PARAMS] and 'name' in filters:
-            # most endpoints only support filtering by name, so remaining `filters` are applied on returned objects
+        server_filterable_fields = self._get_server_filterable_fields(operation_name)
+        if QueryParams.FILTER not in url_params[ParamName.QUERY_PARAMS] and 'name' in server_filterable_fields \
+                and 'name' in filters:
             url_params[ParamName.QUERY_PARAMS][QueryParams.FILTER] = self._stringify_name_filter(filters)
 
+        is_filtered_on_server = QueryParams.FILTER in url_params[ParamName.QUERY_PARAMS]
+        page_size = DEFAULT_PAGE_SIZE if is_filtered_on_server or not filters else CLIENT_SIDE_FILTERING_PAGE_SIZE
+
         item_generator = iterate_over_pageable_resource(
-            partial(self.send_general_request, operation_name=operation_name), url_params
+            partial(self.send_general_request, operation_name=operation_name), url_params, page_size
         )
-        return (i for i in item_generator if match_filters(filters, i))
+        if not filters:
+            return item_generator
+        # the server matches names partially, so all `filters` are still applied on returned objects
+        match_filters = _get_filters_matcher(filters)
+        return (i for i in item_generator if match_filters(i))
+
+    def _get_server_filterable_fields(self, operation_name):
+        """
+        Returns the fields that objects can be filtered by on the server side for the given operation.
+        Operations that do not describe their query params are assumed to support the `filter` query param.
+        """
+        if operation_name not in self._server_filterable_fields_cache:
+            op_spec = self.get_operation_spec(operation_name)
+            query_params_spec = (op_spec.get(OperationField.PARAMETERS) or {}).get(OperationParams.QUERY)
+            if query_params_spec is None or QueryParams.FILTER in query_params_spec:
+                self._server_filterable_fields_cache[operation_name] = SERVER_FILTERABLE_FIELDS
+            else:
+                self._server_filterable_fields_cache[operation_name] = frozenset()
+        return self._server_filterable_fields_cache[operation_name]
 
     def _stringify_name_filter(self, filters):
-        build_version = self.get_build_version()
-        if build_version >= '6.4.0':
-            return "fts~%s" % filters['name']
-        return "name:%s" % filters['name']
+        if self._name_filter_prefix is None:
+            # the filter syntax depends only on the device version, so it is resolved once
+            self._name_filter_prefix = 'fts~' if self.get_build_version() >= '6.4.0' else 'name:'
+        return '%s%s' % (self._name_filter_prefix, filters['name'])
 
     def _fetch_system_info(self):
         if not self._system_info:
@@ -357,27 +470,37 @@ class BaseConfigurationResource(object):
         if not params.get(ParamName.FILTERS):
             params[ParamName.FILTERS] = {'name': data['name']}
 
-        obj = None
         filtered_objs = self.get_objects_by_filter(get_list_operation, params)
+        # a single object is expected, so there is no need to look for more than two matching objects
+        matching_objs = list(islice(filtered_objs, 2))
 
-        for i, obj in enumerate(filtered_objs):
-            if i > 0:
-                raise FtdConfigurationError(MULTIPLE_DUPLICATES_FOUND_ERROR)
-            obj = obj
-
-        return obj
+        if len(matching_objs) > 1:
+            raise FtdConfigurationError(MULTIPLE_DUPLICATES_FOUND_ERROR)
+        return matching_objs[0] if matching_objs else None
 
     def _find_get_list_operation(self, model_name):
-        operations = self.get_operation_specs_by_model_name(model_name) or {}
-        return next((
-            op for op, op_spec in operations.items()
-            if self._operation_checker.is_get_list_operation(op, op_spec)), None)
+        return self._get_model_get_operations(model_name)[0]
 
     def _find_get_operation(self, model_name):
-        operations = self.get_operation_specs_by_model_name(model_name) or {}
-        return next((
-            op for op, op_spec in operations.items()
-            if self._operation_checker.is_get_operation(op, op_spec)), None)
+        return self._get_model_get_operations(model_name)[1]
+
+    def _get_model_get_operations(self, model_name):
+        """
+        Finds 'get list of objects' and 'get object' operations of the model in a single pass over its operations.
+        The result is cached, so the operations are not looked up again for the same model.
+
+        :return: names of 'get list of objects' and 'get object' operations, None if the operation is not found
+        :rtype: tuple
+        """
+        if model_name not in self._model_get_operations_cache:
+            get_list_operation = get_operation = None
+            for op_name, op_spec in (self.get_operation_specs_by_model_name(model_name) or {}).items():
+                if get_list_operation is None and self._operation_checker.is_get_list_operation(op_name, op_spec):
+                    get_list_operation = op_name
+                elif get_operation is None and self._operation_checker.is_get_operation(op_name, op_spec):
+                    get_operation = op_name
+            self._model_get_operations_cache[model_name] = get_list_operation, get_operation
+        return self._model_get_operations_cache[model_name]
 
     def delete_object(self, operation_name, params):
         def is_invalid_uuid_error(err):
@@ -397,14 +520,21 @@ class BaseConfigurationResource(object):
         model_name = self.get_operation_spec(operation_name)[OperationField.MODEL_NAME]
         get_operation = self._find_get_operation(model_name)
 
+        # the object representation seen last during this run saves a GET request when the object is edited
+        cache_key = _get_object_cache_key(operation_name, path_params)
         if get_operation:
-            existing_object = self.send_general_request(get_operation, {ParamName.PATH_PARAMS: path_params})
+            existing_object = self._object_cache.get(cache_key)
+            if existing_object is None:
+                existing_object = self.send_general_request(get_operation, {ParamName.PATH_PARAMS: path_params})
             if not existing_object:
                 raise FtdConfigurationError('Referenced object does not exist')
             elif equal_objects(existing_object, data):
+                self._object_cache[cache_key] = existing_object
                 return existing_object
 
         new_object = self.send_general_request(operation_name, params)
+        if new_object:
+            self._object_cache[cache_key] = new_object
         return new_object if self.config_changed else existing_object
 
     def send_general_request(self, operation_name, params):
@@ -416,21 +546,38 @@ class BaseConfigurationResource(object):
         stop_if_check_mode()
 
         data, query_params, path_params = _get_user_params(params)
-        op_spec = self.get_operation_spec(operation_name)
-        url, method = op_spec[OperationField.URL], op_spec[OperationField.METHOD]
+        url, method = self._get_request_params(operation_name)
 
         return self._send_request(url, method, data, path_params, query_params)
 
+    def _get_request_params(self, operation_name):
+        """
+        Returns the URL and HTTP method of the operation. The pair is cached not to index the spec on every request.
+
+        :param operation_name: name of the operation being called by the user
+        :type operation_name: str
+        :return: URL and HTTP method of the operation
+        :rtype: tuple
+        """
+        if operation_name not in self._request_params_cache:
+            op_spec = self.get_operation_spec(operation_name)
+            self._request_params_cache[operation_name] = op_spec[OperationField.URL], op_spec[OperationField.METHOD]
+        return self._request_params_cache[operation_name]
+
     def _send_request(self, url_path, http_method, body_params=None, path_params=None, query_params=None):
         def raise_for_failure(resp):
             if not resp[ResponseParams.SUCCESS]:
                 raise FtdServerError(resp[ResponseParams.RESPONSE], resp[ResponseParams.STATUS_CODE])
 
-        response = self._conn.send_request(url_path=url_path, http_method=http_method, body_params=body_params,
-                                           path_params=path_params, query_params=query_params)
+        response = self._conn_send(url_path=url_path, http_method=http_method, body_params=body_params,
+                                   path_params=path_params, query_params=query_params)
+        is_unsafe_method = http_method != HTTPMethod.GET
+        if is_unsafe_method:
+            # any write attempt may change the server state or show that the cached one is outdated (e.g. a stale
+            # version error), so cached objects are fetched again when needed
+            self._object_cache.clear()
         raise_for_failure(response)
 
-        is_unsafe_method = http_method != HTTPMethod.GET
         config_changed = response[ResponseParams.STATUS_CODE] != NO_CONTENT_STATUS or http_method == HTTPMethod.DELETE
         if is_unsafe_method and config_changed:
             self.config_changed = True
@@ -438,30 +585,54 @@ class BaseConfigurationResource(object):
 
     def validate_params(self, operation_name, params):
         report = {}
-        op_spec = self.get_operation_spec(operation_name)
+        _, method = self._get_request_params(operation_name)
         data, query_params, path_params = _get_user_params(params)
 
-        def validate(validation_method, field_name, user_params):
-            key = 'Invalid %s provided' % field_name
-            try:
-                is_valid, validation_report = validation_method(operation_name, user_params)
-                if not is_valid:
-                    report[key] = validation_report
-            except Exception as e:
-                report[key] = str(e)
-            return report
+        user_params = {ParamName.QUERY_PARAMS: query_params, ParamName.PATH_PARAMS: path_params}
+        if method == HTTPMethod.POST or method == HTTPMethod.PUT:
+            user_params[ParamName.DATA] = data
 
-        validate(self._conn.validate_query_params, ParamName.QUERY_PARAMS, query_params)
-        validate(self._conn.validate_path_params, ParamName.PATH_PARAMS, path_params)
-        if is_post_request(op_spec) or is_put_request(op_spec):
-            validate(self._conn.validate_data, ParamName.DATA, data)
+        for field_name, (is_valid, validation_report) in self._validate_all(operation_name, user_params).items():
+            if not is_valid:
+                report['Invalid %s provided' % field_name] = validation_report
 
         if report:
             raise ValidationError(report)
 
+    def _validate_all(self, operation_name, user_params):
+        """
+        Validates all given params with a single call to the connection. Falls back to validating params one
+        by one when the connection plugin does not support batch validation.
+
+        :param operation_name: name of the operation being called by the user
+        :type operation_name: str
+        :param user_params: params to validate keyed by `ParamName` values
+        :type user_params: dict
+        :return: `(is_valid, validation_report)` pairs keyed by `ParamName` values
+        :rtype: dict
+        """
+        if self._validate_all_supported is not False:
+            try:
+                results = self._conn.validate_all(operation_name, user_params)
+                self._validate_all_supported = True
+                return results
+            except (AttributeError, ConnectionError) as e:
+                if self._validate_all_supported or not _is_method_not_found_error(e):
+                    raise
+                self._validate_all_supported = False
+
+        validators = self._conn_validators
+        results = {}
+        for field_name, params in user_params.items():
+            try:
+                results[field_name] = validators[field_name](operation_name, params)
+            except Exception as e:
+                results[field_name] = False, str(e)
+        return results
+
     @staticmethod
     def _get_operation_name(checker, operations):
-        return next((op_name for op_name, op_spec in iteritems(operations) if checker(op_name, op_spec)), None)
+        return next((op_name for op_name, op_spec in operations.items() if checker(op_name, op_spec)), None)
 
     def _add_upserted_object(self, model_operations, params):
         add_op_name = self._get_operation_name(self._operation_checker.is_add_operation, model_operations)
@@ -476,6 +647,7 @@ class BaseConfigurationResource(object):
 
         params['path_params']['objId'] = existing_object['id']
         copy_identity_properties(existing_object, params['data'])
+        self._object_cache[_get_object_cache_key(edit_op_name, params['path_params'])] = existing_object
         return self.edit_object(edit_op_name, params)
 
     def upsert_object(self, op_name, params):
@@ -517,6 +689,27 @@ def _set_default(params, field_name, value):
         params[field_name] = value
 
 
+def _is_method_not_found_error(e):
+    # a local connection object lacks the attribute, while the connection proxy gets a JSON-RPC error
+    return isinstance(e, AttributeError) or getattr(e, 'code', None) == METHOD_NOT_FOUND_ERROR_CODE
+
+
+def _get_object_cache_key(operation_name, path_params):
+    return operation_name, tuple(sorted(path_params.items()))
+
+
+def _get_filters_matcher(filters):
+    """
+    Builds a predicate checking that an object contains all `filters` fields with the same values.
+    Filter items are evaluated once here, so only the filter keys are looked up for every object.
+    """
+    filter_items = tuple(filters.items())
+    if len(filter_items) == 1:
+        (key, value), = filter_items
+        return lambda obj: obj.get(key, _MISSING) == value
+    return lambda obj: all(obj.get(k, _MISSING) == v for k, v in filter_items)
+
+
 def is_post_request(operation_spec):
     return operation_spec[OperationField.METHOD] == HTTPMethod.POST
 
@@ -530,7 +723,7 @@ def _get_user_params(params):
         ParamName.PATH_PARAMS) or {}
 
 
-def iterate_over_pageable_resource(resource_func, params):
+def iterate_over_pageable_resource(resource_func, params, page_size=DEFAULT_PAGE_SIZE):
     """
     A generator function that iterates over a resource that supports pagination and lazily returns present items
     one by one.
@@ -540,14 +733,16 @@ def iterate_over_pageable_resource(resource_func, params):
     :param params: initial dictionary of parameters that will be passed to the resource_func.
                    Should contain `query_params` inside.
     :type params: dict
+    :param page_size: number of items requested per page when `limit` is not set in `query_params`
+    :type page_size: int
     :return: an iterator containing returned items
     :rtype: iterator of dict
     """
     # creating a copy not to mutate passed dict
     params = copy.deepcopy(params)
-    params[ParamName.QUERY_PARAMS].setdefault('limit', DEFAULT_PAGE_SIZE)
-    params[ParamName.QUERY_PARAMS].setdefault('offset', DEFAULT_OFFSET)
-    limit = int(params[ParamName.QUERY_PARAMS]['limit'])
+    query_params = params[ParamName.QUERY_PARAMS]
+    query_params['limit'] = limit = int(query_params.get('limit', page_size))
+    query_params['offset'] = int(query_params.get('offset', DEFAULT_OFFSET))
 
     def received_less_items_than_requested(items_in_response, items_expected):
         if items_in_response == items_expected:
@@ -561,16 +756,23 @@ def iterate_over_pageable_resource(resource_func, params):
                 items_in_response, items_expected)
         )
 
+    def server_has_no_more_pages(paging):
+        # `next` holds links to the following pages and is empty for the last one
+        return bool(paging) and 'next' in paging and not paging['next']
+
+    result = resource_func(params=params)
     while True:
-        result = resource_func(params=params)
+        is_last_page = received_less_items_than_requested(len(result['items']), limit) or \
+            server_has_no_more_pages(result.get('paging'))
 
         for item in result['items']:
             yield item
 
-        if received_less_items_than_requested(len(result['items']), limit):
+        if is_last_page:
             break
-
-        # creating a copy not to mutate existing dict
-        params = copy.deepcopy(params)
-        query_params = params[ParamName.QUERY_PARAMS]
-        query_params['offset'] = int(query_params['offset']) + limit
+        # creating shallow copies not to mutate dicts passed to the previous call
+        params = dict(params)
+        query_params = dict(params[ParamName.QUERY_PARAMS])
+        query_params['offset'] += limit
+        params[ParamName.QUERY_PARAMS] = query_params
+        result = resource_func(params=params)
@@ -309,6 +309,17 @@ class TestFtdHttpApi(unittest.TestCase):
 
         assert self.ftd_plugin.get_operation_specs_by_model_name('nonExistingOperation') is None
 
+    def test_validate_all_should_validate_only_given_params(self):
+        self.ftd_plugin._api_validator = mock.Mock()
+        self.ftd_plugin._api_validator.validate_query_params.return_value = True, None
+        self.ftd_plugin._api_validator.validate_path_params.side_effect = Exception('Invalid operation')
+
+        result = self.ftd_plugin.validate_all('testOp', {'query_params': {'limit': 1}, 'path_params': {}})
+
+        assert {'query_params': (True, None), 'path_params': (False, 'Invalid operation')} == result
+        self.ftd_plugin._api_validator.validate_query_params.assert_called_once_with('testOp', {'limit': 1})
+        self.ftd_plugin._api_validator.validate_data.assert_not_called()
+
     @staticmethod
     def _connection_response(response, status=200):
         response_mock = mock.Mock()
@@ -20,17 +20,18 @@ import json
 import unittest
 
 import pytest
+from ansible.module_utils.connection import ConnectionError
 from units.compat import mock
 from units.compat.mock import call, patch
 
 from module_utils.configuration import iterate_over_pageable_resource, BaseConfigurationResource, \
-    OperationChecker, OperationNamePrefix, ParamName, QueryParams
+    FtdInvalidOperationNameError, OperationChecker, OperationKind, OperationNamePrefix, ParamName, QueryParams
 
 try:
-    from ansible.module_utils.common import HTTPMethod, FtdUnexpectedResponse
+    from ansible.module_utils.common import FtdServerError, HTTPMethod, FtdUnexpectedResponse, ResponseParams
     from ansible.module_utils.fdm_swagger_client import ValidationError, OperationField
 except ImportError:
-    from module_utils.common import HTTPMethod, FtdUnexpectedResponse
+    from module_utils.common import FtdServerError, HTTPMethod, FtdUnexpectedResponse, ResponseParams
     from module_utils.fdm_swagger_client import ValidationError, OperationField
 
 
@@ -42,6 +43,9 @@ class TestBaseConfigurationResource(object):
         connection_instance.validate_data.return_value = True, None
         connection_instance.validate_query_params.return_value = True, None
         connection_instance.validate_path_params.return_value = True, None
+        # emulate a connection plugin that supports neither bulk loading of specs nor batch validation
+        del connection_instance.get_all_operation_specs
+        del connection_instance.validate_all
 
         return connection_instance
 
@@ -131,7 +135,7 @@ class TestBaseConfigurationResource(object):
             {ParamName.FILTERS: {'type': 'foo'}}))
         send_request_mock.assert_has_calls(
             [
-                mock.call('/object/', 'get', {}, {}, {'limit': 10, 'offset': 0})
+                mock.call('/object/', 'get', {}, {}, {'limit': 100, 'offset': 0})
             ]
         )
 
@@ -160,6 +164,107 @@ class TestBaseConfigurationResource(object):
             ]
         )
 
+    @patch.object(BaseConfigurationResource, '_send_request')
+    def test_get_objects_by_filter_should_not_match_missing_fields_with_none(self, send_request_mock,
+                                                                             connection_mock):
+        objects = [
+            {'name': 'obj1', 'description': None},
+            {'name': 'obj2'}
+        ]
+        connection_mock.get_operation_spec.return_value = {
+            'method': HTTPMethod.GET,
+            'url': '/object/'
+        }
+        resource = BaseConfigurationResource(connection_mock, False)
+
+        send_request_mock.side_effect = [{'items': objects}, {'items': []}]
+        assert [objects[0]] == list(resource.get_objects_by_filter('test', {ParamName.FILTERS: {'description': None}}))
+
+        send_request_mock.side_effect = [{'items': objects}, {'items': []}]
+        assert [objects[0]] == list(resource.get_objects_by_filter(
+            'test',
+            {ParamName.FILTERS: {'description': None, 'name': 'obj1'}, ParamName.QUERY_PARAMS: {'filter': 'x'}}))
+
+    @patch.object(BaseConfigurationResource, '_fetch_system_info')
+    @patch.object(BaseConfigurationResource, '_send_request')
+    def test_get_objects_by_filter_when_server_filter_is_not_supported(self, send_request_mock,
+                                                                       fetch_system_info_mock, connection_mock):
+        objects = [
+            {'name': 'obj1', 'type': 1},
+            {'name': 'obj2', 'type': 1}
+        ]
+        connection_mock.get_operation_spec.return_value = {
+            'method': HTTPMethod.GET,
+            'url': '/object/',
+            'parameters': {'path': {}, 'query': {'limit': {'type': 'integer', 'required': False}}}
+        }
+        resource = BaseConfigurationResource(connection_mock, False)
+
+        send_request_mock.side_effect = [{'items': objects}, {'items': []}]
+        assert [objects[1]] == list(resource.get_objects_by_filter('test', {ParamName.FILTERS: {'name': 'obj2'}}))
+        send_request_mock.assert_has_calls(
+            [
+                mock.call('/object/', 'get', {}, {}, {'limit': 100, 'offset': 0})
+            ]
+        )
+        fetch_system_info_mock.assert_not_called()
+
+    def test_edit_object_should_reuse_object_seen_during_previous_edit(self, connection_mock):
+        operations = {
+            'editObject': {'method': HTTPMethod.PUT, 'modelName': 'Object', 'url': '/object/{objId}'},
+            'getObject': {'method': HTTPMethod.GET, 'modelName': 'Object', 'url': '/object/{objId}',
+                          'returnMultipleItems': False}
+        }
+        connection_mock.get_operation_spec.side_effect = lambda name: operations[name]
+        connection_mock.get_operation_specs_by_model_name.return_value = operations
+        connection_mock.send_request.side_effect = [
+            {ResponseParams.SUCCESS: True, ResponseParams.STATUS_CODE: 200,
+             ResponseParams.RESPONSE: {'id': '123', 'name': 'old'}},
+            {ResponseParams.SUCCESS: True, ResponseParams.STATUS_CODE: 200,
+             ResponseParams.RESPONSE: {'id': '123', 'name': 'new'}}
+        ]
+        resource = BaseConfigurationResource(connection_mock, False)
+
+        params = {ParamName.PATH_PARAMS: {'objId': '123'}, ParamName.DATA: {'id': '123', 'name': 'new'}}
+        assert {'id': '123', 'name': 'new'} == resource.edit_object('editObject', params)
+        assert connection_mock.send_request.call_count == 2
+
+        connection_mock.send_request.reset_mock()
+        assert {'id': '123', 'name': 'new'} == resource.edit_object('editObject', params)
+        connection_mock.send_request.assert_not_called()
+
+    def test_edit_object_should_get_object_again_after_failed_edit(self, connection_mock):
+        operations = {
+            'editObject': {'method': HTTPMethod.PUT, 'modelName': 'Object', 'url': '/object/{objId}'},
+            'getObject': {'method': HTTPMethod.GET, 'modelName': 'Object', 'url': '/object/{objId}',
+                          'returnMultipleItems': False}
+        }
+        connection_mock.get_operation_spec.side_effect = lambda name: operations[name]
+        connection_mock.get_operation_specs_by_model_name.return_value = operations
+        connection_mock.send_request.side_effect = [
+            {ResponseParams.SUCCESS: True, ResponseParams.STATUS_CODE: 200,
+             ResponseParams.RESPONSE: {'id': '123', 'name': 'old'}},
+            {ResponseParams.SUCCESS: True, ResponseParams.STATUS_CODE: 200,
+             ResponseParams.RESPONSE: {'id': '123', 'name': 'new'}},
+            {ResponseParams.SUCCESS: False, ResponseParams.STATUS_CODE: 422,
+             ResponseParams.RESPONSE: 'Version is outdated'},
+            {ResponseParams.SUCCESS: True, ResponseParams.STATUS_CODE: 200,
+             ResponseParams.RESPONSE: {'id': '123', 'name': 'other'}},
+            {ResponseParams.SUCCESS: True, ResponseParams.STATUS_CODE: 200,
+             ResponseParams.RESPONSE: {'id': '123', 'name': 'new'}}
+        ]
+        resource = BaseConfigurationResource(connection_mock, False)
+
+        params = {ParamName.PATH_PARAMS: {'objId': '123'}, ParamName.DATA: {'id': '123', 'name': 'new'}}
+        other_params = {ParamName.PATH_PARAMS: {'objId': '123'}, ParamName.DATA: {'id': '123', 'name': 'other'}}
+        resource.edit_object('editObject', params)
+        with pytest.raises(FtdServerError):
+            resource.edit_object('editObject', other_params)
+
+        connection_mock.send_request.reset_mock()
+        assert {'id': '123', 'name': 'new'} == resource.edit_object('editObject', params)
+        assert connection_mock.send_request.call_count == 2
+
     def test_module_should_fail_if_validation_error_in_data(self, connection_mock):
         connection_mock.get_operation_spec.return_value = {'method': HTTPMethod.POST, 'url': '/test'}
         report = {
@@ -317,6 +422,136 @@ class TestBaseConfigurationResource(object):
                 'invalid_type': [{'actually_value': 'test', 'expected_type': 'integer', 'path': 'f_integer'}],
                 'required': ['other_param']}}
 
+    def test_validate_params_should_validate_all_params_in_single_call(self, connection_mock):
+        connection_mock.validate_all = mock.Mock(return_value={
+            ParamName.QUERY_PARAMS: [True, None],
+            ParamName.PATH_PARAMS: [False, 'path_params report'],
+            ParamName.DATA: [False, 'data report']
+        })
+        connection_mock.get_operation_spec.return_value = {'method': HTTPMethod.PUT, 'url': '/test'}
+        resource = BaseConfigurationResource(connection_mock, False)
+        params = {ParamName.DATA: {'name': 'test'}, ParamName.PATH_PARAMS: {'objId': '1'}}
+
+        with pytest.raises(ValidationError) as e_info:
+            resource.validate_params('editTest', params)
+
+        assert {'Invalid path_params provided': 'path_params report',
+                'Invalid data provided': 'data report'} == e_info.value.args[0]
+        connection_mock.validate_all.assert_called_once_with('editTest', {
+            ParamName.QUERY_PARAMS: {},
+            ParamName.PATH_PARAMS: {'objId': '1'},
+            ParamName.DATA: {'name': 'test'}
+        })
+        connection_mock.validate_path_params.assert_not_called()
+
+    def test_validate_params_should_fall_back_when_batch_validation_is_not_supported(self, connection_mock):
+        connection_mock.validate_all = mock.Mock(side_effect=ConnectionError('Method not found', code=-32601))
+        connection_mock.get_operation_spec.return_value = {'method': HTTPMethod.GET, 'url': '/test'}
+        resource = BaseConfigurationResource(connection_mock, False)
+
+        resource.validate_params('getTest', {})
+        resource.validate_params('getTest', {})
+
+        connection_mock.validate_all.assert_called_once_with('getTest', {ParamName.QUERY_PARAMS: {},
+                                                                         ParamName.PATH_PARAMS: {}})
+        assert connection_mock.validate_query_params.call_count == 2
+        assert connection_mock.validate_path_params.call_count == 2
+        connection_mock.validate_data.assert_not_called()
+
+    def test_validate_params_should_not_fall_back_when_batch_validation_fails(self, connection_mock):
+        connection_mock.validate_all = mock.Mock(side_effect=ConnectionError('unable to connect to socket'))
+        connection_mock.get_operation_spec.return_value = {'method': HTTPMethod.GET, 'url': '/test'}
+        resource = BaseConfigurationResource(connection_mock, False)
+
+        with pytest.raises(ConnectionError):
+            resource.validate_params('getTest', {})
+        with pytest.raises(ConnectionError):
+            resource.validate_params('getTest', {})
+
+        assert connection_mock.validate_all.call_count == 2
+        connection_mock.validate_query_params.assert_not_called()
+
+    def test_operation_specs_should_be_loaded_in_single_call(self, connection_mock):
+        operations = {
+            'getObjectList': {'method': HTTPMethod.GET, 'url': '/object', 'modelName': 'Object'},
+            'addObject': {'method': HTTPMethod.POST, 'url': '/object', 'modelName': 'Object'},
+            'getSystemInformation': {'method': HTTPMethod.GET, 'url': '/info', 'modelName': None}
+        }
+        connection_mock.get_all_operation_specs = mock.Mock(return_value=operations)
+        resource = BaseConfigurationResource(connection_mock, False)
+
+        assert operations['addObject'] == resource.get_operation_spec('addObject')
+        assert resource.get_operation_spec('nonExistingOperation') is None
+        assert {'getObjectList': operations['getObjectList'], 'addObject': operations['addObject']} == \
+            resource.get_operation_specs_by_model_name('Object')
+        assert resource.get_operation_specs_by_model_name('NonExistingModel') is None
+
+        connection_mock.get_all_operation_specs.assert_called_once_with()
+        connection_mock.get_operation_spec.assert_not_called()
+        connection_mock.get_operation_specs_by_model_name.assert_not_called()
+
+    def test_operation_specs_should_be_loaded_one_by_one_when_bulk_loading_is_not_supported(self, connection_mock):
+        connection_mock.get_all_operation_specs = mock.Mock(side_effect=ConnectionError('Method not found',
+                                                                                        code=-32601))
+        connection_mock.get_operation_spec.return_value = {'method': HTTPMethod.GET, 'url': '/object'}
+        resource = BaseConfigurationResource(connection_mock, False)
+
+        assert {'method': HTTPMethod.GET, 'url': '/object'} == resource.get_operation_spec('getObject')
+        assert {'method': HTTPMethod.GET, 'url': '/object'} == resource.get_operation_spec('getOtherObject')
+
+        connection_mock.get_all_operation_specs.assert_called_once_with()
+        assert connection_mock.get_operation_spec.call_count == 2
+
+    def test_operation_specs_should_not_be_loaded_one_by_one_when_bulk_loading_fails(self, connection_mock):
+        connection_mock.get_all_operation_specs = mock.Mock(
+            side_effect=ConnectionError('Failed to download API specification'))
+        resource = BaseConfigurationResource(connection_mock, False)
+
+        with pytest.raises(ConnectionError):
+            resource.get_operation_spec('getObject')
+        connection_mock.get_operation_spec.assert_not_called()
+
+    def test_get_operations_of_model_should_be_found_once(self, connection_mock):
+        connection_mock.get_operation_specs_by_model_name.return_value = {
+            'addObject': {'method': HTTPMethod.POST, 'url': '/object'},
+            'getObjectList': {'method': HTTPMethod.GET, 'url': '/object', 'returnMultipleItems': True},
+            'getObject': {'method': HTTPMethod.GET, 'url': '/object/{objId}', 'returnMultipleItems': False}
+        }
+        resource = BaseConfigurationResource(connection_mock, False)
+
+        assert 'getObjectList' == resource._find_get_list_operation('Object')
+        assert 'getObject' == resource._find_get_operation('Object')
+        connection_mock.get_operation_specs_by_model_name.assert_called_once_with('Object')
+
+    @pytest.mark.parametrize("op_name, op_spec, expected_kind",
+                             [
+                                 ("addTest", {'method': HTTPMethod.POST}, OperationKind.ADD),
+                                 ("editTest", {'method': HTTPMethod.PUT}, OperationKind.EDIT),
+                                 ("deleteTest", {'method': HTTPMethod.DELETE}, OperationKind.DELETE),
+                                 ("getTestList", {'method': HTTPMethod.GET, 'returnMultipleItems': True},
+                                  OperationKind.GET_LIST),
+                                 ("getTest", {'method': HTTPMethod.GET, 'returnMultipleItems': False},
+                                  OperationKind.GENERAL),
+                                 ("addTest", {'method': HTTPMethod.PUT, 'returnMultipleItems': False},
+                                  OperationKind.GENERAL),
+                                 ("Test", {'method': HTTPMethod.GET, 'returnMultipleItems': False},
+                                  OperationKind.GENERAL)
+                             ])
+    def test_get_operation_kind(self, op_name, op_spec, expected_kind, connection_mock):
+        connection_mock.get_operation_spec.return_value = op_spec
+        resource = BaseConfigurationResource(connection_mock, False)
+
+        assert expected_kind == resource._get_operation_kind(op_name)
+        assert expected_kind == resource._get_operation_kind(op_name)
+        connection_mock.get_operation_spec.assert_called_once_with(op_name)
+
+    def test_get_operation_kind_should_fail_for_unknown_operation(self, connection_mock):
+        connection_mock.get_operation_spec.return_value = None
+        resource = BaseConfigurationResource(connection_mock, False)
+
+        with pytest.raises(FtdInvalidOperationNameError):
+            resource._get_operation_kind('unknownOperation')
+
     @pytest.mark.parametrize("test_api_version, expected_result",
                              [
                                  ("6.2.3", "name:object_name"),
@@ -336,6 +571,8 @@ class TestBaseConfigurationResource(object):
 
             assert resource._stringify_name_filter(filters) == expected_result, "Unexpected result for version %s" % (
                 test_api_version)
+            assert resource._stringify_name_filter(filters) == expected_result
+            fetch_system_info_mock.assert_called_once_with()
 
 
 class TestIterateOverPageableResource(object):
@@ -398,6 +635,16 @@ class TestIterateOverPageableResource(object):
             call(params={'query_params': {'offset': 0, 'limit': 1}})
         ])
 
+    def test_iterate_over_pageable_resource_should_use_page_size_when_limit_is_not_set(self):
+        resource_func = mock.Mock(return_value={'items': []})
+
+        assert [] == list(iterate_over_pageable_resource(resource_func, {'query_params': {}}, page_size=50))
+        resource_func.assert_called_once_with(params={'query_params': {'offset': 0, 'limit': 50}})
+
+        resource_func.reset_mock()
+        assert [] == list(iterate_over_pageable_resource(resource_func, {'query_params': {'limit': 5}}, page_size=50))
+        resource_func.assert_called_once_with(params={'query_params': {'offset': 0, 'limit': 5}})
+
     def test_iterate_over_pageable_resource_should_preserve_offset(self):
         resource_func = mock.Mock(side_effect=[
             {'items': ['foo']},
@@ -421,10 +668,44 @@ class TestIterateOverPageableResource(object):
 
         assert ['foo'] == list(items)
         resource_func.assert_has_calls([
-            call(params={'query_params': {'offset': '1', 'limit': '1'}}),
-            call(params={'query_params': {'offset': 2, 'limit': '1'}})
+            call(params={'query_params': {'offset': 1, 'limit': 1}}),
+            call(params={'query_params': {'offset': 2, 'limit': 1}})
+        ])
+
+    def test_iterate_over_pageable_resource_should_raise_exception_from_next_page_request(self):
+        resource_func = mock.Mock(side_effect=[
+            {'items': ['foo']},
+            FtdUnexpectedResponse('Failed to fetch the next page'),
+        ])
+
+        items = iterate_over_pageable_resource(resource_func, {'query_params': {'limit': 1}})
+
+        assert 'foo' == next(items)
+        with pytest.raises(FtdUnexpectedResponse):
+            next(items)
+
+    def test_iterate_over_pageable_resource_should_not_rely_on_paging_count(self):
+        resource_func = mock.Mock(side_effect=[
+            {'items': ['foo'], 'paging': {'prev': [], 'next': ['/page2'], 'offset': 0, 'limit': 1, 'count': 1}},
+            {'items': ['bar'], 'paging': {'prev': ['/page1'], 'next': [], 'offset': 1, 'limit': 1, 'count': 1}},
         ])
 
+        items = iterate_over_pageable_resource(resource_func, {'query_params': {'limit': 1}})
+
+        assert ['foo', 'bar'] == list(items)
+        assert resource_func.call_count == 2
+
+    def test_iterate_over_pageable_resource_should_stop_when_there_is_no_next_page(self):
+        resource_func = mock.Mock(side_effect=[
+            {'items': ['foo'], 'paging': {'prev': [], 'next': ['/page2']}},
+            {'items': ['bar'], 'paging': {'prev': ['/page1'], 'next': []}},
+        ])
+
+        items = iterate_over_pageable_resource(resource_func, {'query_params': {'limit': 1}})
+
+        assert ['foo', 'bar'] == list(items)
+        assert resource_func.call_count == 2
+
     def test_iterate_over_pageable_resource_raises_exception_when_server_returned_more_items_than_requested(self):
         resource_func = mock.Mock(side_effect=[
             {'items': ['foo', 'redundant_bar']},
@@ -435,7 +716,7 @@ class TestIterateOverPageableResource(object):
             list(iterate_over_pageable_resource(resource_func, {'query_params': {'offset': '1', 'limit': '1'}}))
 
         resource_func.assert_has_calls([
-            call(params={'query_params': {'offset': '1', 'limit': '1'}})
+            call(params={'query_params': {'offset': 1, 'limit': 1}})
         ])
 
 
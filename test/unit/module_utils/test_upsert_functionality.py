@@ -300,6 +300,9 @@ class TestUpsertOperationFunctionalTests(object):
         connection_instance.validate_data.return_value = True, None
         connection_instance.validate_query_params.return_value = True, None
         connection_instance.validate_path_params.return_value = True, None
+        # emulate a connection plugin that supports neither bulk loading of specs nor batch validation
+        del connection_instance.get_all_operation_specs
+        del connection_instance.validate_all
         return connection_instance
 
     def test_module_should_create_object_when_upsert_operation_and_object_does_not_exist(self, connection_mock):
@@ -735,6 +738,63 @@ class TestUpsertOperationFunctionalTests(object):
         assert result.code == 422
         assert result.response == 'Validation failed due to a duplicate name'
 
+    def test_module_should_return_existing_object_when_upsert_operation_and_object_is_added_meanwhile(
+            self, connection_mock):
+        url = '/test'
+        url_with_id_templ = '{0}/{1}'.format(url, '{objId}')
+
+        params = {
+            'operation': 'upsertObject',
+            'data': {'name': 'testObject', 'value': '3333', 'type': 'object'},
+            'register_as': 'test_var'
+        }
+        existing_obj = {'id': '123', 'version': '1', 'name': 'testObject', 'value': '3333', 'type': 'object'}
+        sent_methods = []
+
+        def request_handler(url_path=None, http_method=None, body_params=None, path_params=None, query_params=None):
+            # the object is added on the server after the first lookup, so the add operation fails
+            sent_methods.append(http_method)
+            if http_method == HTTPMethod.POST:
+                return {
+                    ResponseParams.SUCCESS: False,
+                    ResponseParams.RESPONSE: DUPLICATE_NAME_ERROR_MESSAGE,
+                    ResponseParams.STATUS_CODE: UNPROCESSABLE_ENTITY_STATUS
+                }
+            elif http_method == HTTPMethod.GET:
+                assert url_path == url
+                return {
+                    ResponseParams.SUCCESS: True,
+                    ResponseParams.RESPONSE: {
+                        'items': [existing_obj] if HTTPMethod.POST in sent_methods else []
+                    },
+                    ResponseParams.STATUS_CODE: 200,
+                }
+            else:
+                assert False
+
+        operations = {
+            'getObjectList': {'method': HTTPMethod.GET, 'modelName': 'Object', 'url': url, 'returnMultipleItems': True},
+            'addObject': {'method': HTTPMethod.POST, 'modelName': 'Object', 'url': url},
+            'editObject': {'method': HTTPMethod.PUT, 'modelName': 'Object', 'url': url_with_id_templ},
+            'otherObjectOperation': {
+                'method': HTTPMethod.GET,
+                'modelName': 'Object',
+                'url': url_with_id_templ,
+                'returnMultipleItems': False}
+        }
+
+        def get_operation_spec(name):
+            return operations[name]
+
+        connection_mock.get_operation_spec = get_operation_spec
+        connection_mock.get_operation_specs_by_model_name.return_value = operations
+        connection_mock.send_request = request_handler
+
+        result = self._resource_execute_operation(params, connection=connection_mock)
+
+        assert existing_obj == result
+        assert [HTTPMethod.GET, HTTPMethod.POST, HTTPMethod.GET] == sent_methods
+
     def test_module_should_fail_when_upsert_operation_and_failed_update_operation(self, connection_mock):
         url = '/test'
         obj_id = '456'